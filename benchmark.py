@@ -0,0 +1,71 @@
+import random
+import sys
+import timeit
+
+from models import BitboardGrid, Grid
+
+# Board sizes to compare, as (rows, columns, mines). The low mine
+# density gives large openings when uncovering.
+BOARD_SIZES = [(16, 16, 40), (32, 32, 40), (64, 64, 80)]
+REPEATS = 5
+
+def sized(grid_type, rows, cols, mines):
+    """Get a subclass of grid_type with the given board size."""
+    return type(grid_type.__name__, (grid_type,),
+                {"GRID_ROWS": rows, "GRID_COLUMNS": cols,
+                 "NUM_MINES": mines})
+
+def opening_cell(grid):
+    """Find a non-mined cell with no mined neighbours."""
+    for row in range(grid.GRID_ROWS):
+        for col in range(grid.GRID_COLUMNS):
+            if (not grid.has_mine_at(row, col)
+                and grid.mined_neighbours(row, col) == 0):
+                return (row, col)
+
+def time_opening(grid_type, seed):
+    """
+    Time uncovering from an opening cell on a fresh grid, then time
+    the win check on the resulting board.
+    """
+    random.seed(seed)
+    grid = grid_type()
+    row, col = opening_cell(grid)
+
+    start = timeit.default_timer()
+    grid.uncover_from(row, col)
+    uncover_time = timeit.default_timer() - start
+
+    start = timeit.default_timer()
+    grid.cells_left_to_uncover()
+    win_check_time = timeit.default_timer() - start
+
+    return uncover_time, win_check_time
+
+def main():
+    """Compare the Cell-object grid with the bitboard grid."""
+    # The Cell-object grid uncovers recursively
+    sys.setrecursionlimit(100000)
+
+    print("{:>12}  {:>12}  {:>12}  {:>12}  {:>12}".format(
+        "board", "uncover", "bb uncover", "win check", "bb win check"))
+
+    for rows, cols, mines in BOARD_SIZES:
+        totals = {Grid: [0, 0], BitboardGrid: [0, 0]}
+
+        for seed in range(REPEATS):
+            for grid_type in totals:
+                times = time_opening(sized(grid_type, rows, cols, mines),
+                                     seed)
+                totals[grid_type][0] += times[0]
+                totals[grid_type][1] += times[1]
+
+        print("{:>12}  {:>10.3f}ms  {:>10.3f}ms  {:>10.3f}ms  {:>10.3f}ms"
+              .format("{}x{}".format(rows, cols),
+                      totals[Grid][0] / REPEATS * 1000,
+                      totals[BitboardGrid][0] / REPEATS * 1000,
+                      totals[Grid][1] / REPEATS * 1000,
+                      totals[BitboardGrid][1] / REPEATS * 1000))
+
+if __name__ == "__main__":
+    main()
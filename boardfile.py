@@ -0,0 +1,134 @@
+import mmap
+from multiprocessing import resource_tracker, shared_memory
+import os
+import sys
+
+from models import BufferGrid
+
+class BoardFile:
+    """
+    A board stored in a file and opened through mmap, so that every
+    process which opens the file shares the same pages of memory.
+
+    Pickling a BoardFile only sends its path, so passing one to a worker
+    process doesn't copy the board. Workers open it read-only.
+    """
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        self.writable = writable
+
+        with open(path, "r+b" if writable else "rb") as f:
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            self._mmap = mmap.mmap(f.fileno(), 0, access=access)
+
+        # A read-only mmap gives a read-only buffer, so any attempt to
+        # make a move through the grid raises a TypeError
+        self.grid = BufferGrid(self._mmap)
+
+    @classmethod
+    def create(cls, path, grid):
+        """
+        Save any Grid to a new board file at path, and open it for
+        writing.
+        """
+        buffer = bytearray(BufferGrid.buffer_size(grid.GRID_ROWS,
+                                                  grid.GRID_COLUMNS))
+        BufferGrid.write_board(grid, buffer)
+
+        with open(path, "wb") as f:
+            f.write(buffer)
+
+        return cls(path, writable=True)
+
+    def __reduce__(self):
+        return (BoardFile, (self.path,))
+
+    def close(self):
+        """Close the file. The grid cannot be used afterwards."""
+        self.grid.release()
+        self._mmap.close()
+
+
+class SharedBoard:
+    """
+    A board stored in a multiprocessing.shared_memory block.
+
+    The process which creates the board is its writer, and should call
+    unlink() once every process has finished with it. Pickling a
+    SharedBoard only sends the block's name, and the receiving process
+    attaches to the same block read-only.
+
+    Read-only attachments are not tracked by multiprocessing's resource
+    tracker, so a reader exiting never frees the block - only the
+    writer's unlink() does.
+    """
+
+    def __init__(self, name, writable=False):
+        self.writable = writable
+
+        if writable:
+            self._shared_memory = shared_memory.SharedMemory(name)
+        else:
+            self._shared_memory = _attach_untracked(name)
+
+        self.name = self._shared_memory.name
+
+        buffer = self._shared_memory.buf
+        if not writable:
+            buffer = buffer.toreadonly()
+
+        self.grid = BufferGrid(buffer)
+
+    @classmethod
+    def create(cls, grid, name=None):
+        """
+        Copy any Grid into a new shared memory block, and attach to it
+        for writing.
+        """
+        size = BufferGrid.buffer_size(grid.GRID_ROWS, grid.GRID_COLUMNS)
+        block = shared_memory.SharedMemory(name, create=True, size=size)
+        BufferGrid.write_board(grid, block.buf)
+
+        board = cls(block.name, writable=True)
+        block.close()
+        return board
+
+    def __reduce__(self):
+        return (SharedBoard, (self.name,))
+
+    def close(self):
+        """
+        Detach from the shared memory block. The grid cannot be used
+        afterwards.
+        """
+        self.grid.release()
+        self._shared_memory.close()
+
+    def unlink(self):
+        """Free the shared memory block once no process needs it."""
+        if os.name == "posix" and sys.version_info < (3, 13):
+            # A reader sharing this process's resource tracker (e.g. a
+            # multiprocessing worker) will have removed the block from
+            # it, so register it again before unlink() unregisters it
+            resource_tracker.register(self._shared_memory._name,
+                                      "shared_memory")
+
+        self._shared_memory.unlink()
+
+
+def _attach_untracked(name):
+    """
+    Attach to an existing shared memory block without registering it
+    with this process's resource tracker, which would otherwise free
+    the block when this process exits.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+
+    block = shared_memory.SharedMemory(name)
+    if os.name == "posix":
+        # Only POSIX shared memory is registered with the tracker
+        resource_tracker.unregister(block._name, "shared_memory")
+
+    return block
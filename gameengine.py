@@ -5,9 +5,10 @@ from models import CellState, Grid
 class GameEngine:
     """Model representing a game of Minesweeper"""
 
-    def __init__(self, view):
-        # Set up a game
-        self.grid = Grid()
+    def __init__(self, view, grid_type=Grid):
+        # Set up a game. grid_type may be any Grid implementation,
+        # e.g. BitboardGrid
+        self.grid = grid_type()
         self.game_over = False
         self.game_start_time = time.time()
 
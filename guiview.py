@@ -1,10 +1,16 @@
 from functools import partial
+import queue
+import threading
 from tkinter import *
 
 from models import CellState, Grid
+from probability import MineProbabilityCalculator
 
 BLANK_CELL = "  "
 
+# How often to check for finished probability calculations, in ms
+PROBABILITY_POLL_INTERVAL = 50
+
 class GuiView:
     """GUI-based view for a minesweeper game."""
     
@@ -18,6 +24,20 @@ class GuiView:
         self._root.title("Minesweeper")
         self._root.resizable(False, False)
 
+        # Mine probability overlay. Probabilities are calculated on a
+        # worker thread; each request is tagged with a generation
+        # number so that results for an outdated board can be dropped
+        self._show_probabilities = BooleanVar(self._root, value=False)
+        self._probability_generation = 0
+        self._probability_requests = queue.Queue()
+        self._probability_results = queue.Queue()
+        self._probability_worker = None
+        self._polling_probabilities = False
+
+        # Cells whose state has changed since probabilities were last
+        # requested, as (row, col, state, mine count) tuples
+        self._changed_cells = []
+
     def game_started(self):
         """
         Called when the game begins.
@@ -37,6 +57,7 @@ class GuiView:
     def cells_updated(self):
         """Called when cells have been uncovered in the grid."""
         self._update_grid()
+        self._request_probabilities()
     
     def mine_hit(self):
         """Called when a mine is hit."""
@@ -54,6 +75,10 @@ class GuiView:
         grid_frame = LabelFrame(self._root, padx=8, pady=8)
         self._buttons = []
 
+        # The state each button is currently showing
+        self._shown_states = [[CellState.COVERED] * Grid.GRID_COLUMNS
+                              for _ in range(Grid.GRID_ROWS)]
+
         for r in range(Grid.GRID_ROWS):
             row = []
             for c in range(Grid.GRID_COLUMNS):
@@ -66,6 +91,10 @@ class GuiView:
                 
                 b.grid(row=r, column=c)
 
+                # Remember the normal background colour so that it can
+                # be restored when the probability overlay is removed
+                self._covered_bg = b["bg"]
+
                 row.append(b)
             self._buttons.append(row)
         
@@ -74,6 +103,13 @@ class GuiView:
         # Status bar
         self._status_bar = Label(self._root, text="Welcome to Minesweeper!")
         self._status_bar.grid(row=1, column=0)
+
+        # Probability overlay toggle
+        overlay_toggle = Checkbutton(
+            self._root, text="Show mine probabilities",
+            variable=self._show_probabilities,
+            command=self._request_probabilities)
+        overlay_toggle.grid(row=2, column=0)
     
     def _flag_cell(self, row, col, event):
         """
@@ -90,13 +126,23 @@ class GuiView:
             self._game.flag_cell(row, col)
     
     def _update_grid(self):
-        """Update the state of the buttons in the grid."""
+        """
+        Update the buttons whose cells have changed state, and note the
+        changes for the probability overlay.
+        """
+        grid = self._game.grid
+
         for r in range(len(self._buttons)):
             for c in range(len(self._buttons[r])):
+                state = grid.cell_state_at(r, c)
+                if state == self._shown_states[r][c]:
+                    continue
+
+                self._shown_states[r][c] = state
                 btn = self._buttons[r][c]
-                grid = self._game.grid
+                mneighbours = None
 
-                if grid.cell_state_at(r, c) == CellState.UNCOVERED:
+                if state == CellState.UNCOVERED:
                     if grid.has_mine_at(r, c):
                         # (c, r) contains a mine
                         btn["bg"] = "red"
@@ -113,13 +159,15 @@ class GuiView:
                         if mneighbours > 0:
                             btn["text"] = mneighbours
                         
-                elif grid.cell_state_at(r, c) == CellState.FLAGGED:
+                elif state == CellState.FLAGGED:
                     btn["fg"] = "red"
                     btn["text"] = "🚩"
                 else:
                     # Cell is covered; resetting the text is necessary
                     # so that a cell returns to blank if it is unflagged
                     btn["text"] = BLANK_CELL
+
+                self._changed_cells.append((r, c, state, mneighbours))
     
     def _disable_grid(self):
         """Disable all buttons in the grid."""
@@ -130,4 +178,125 @@ class GuiView:
     def _set_status(self, message):
         """Display the given message in the status bar."""
         if self._status_bar is not None:
-            self._status_bar["text"] = message
\ No newline at end of file
+            self._status_bar["text"] = message
+
+    def _request_probabilities(self):
+        """
+        Ask the worker thread to recalculate the mine probabilities for
+        the current board, or remove the overlay if it is turned off or
+        the game has finished.
+
+        Any calculation still running for an earlier board will have its
+        result dropped.
+        """
+        self._probability_generation += 1
+
+        if not self._show_probabilities.get() or self._game.game_over:
+            self._clear_probabilities()
+            return
+
+        if self._probability_worker is None:
+            self._probability_worker = threading.Thread(
+                target=self._calculate_probabilities, daemon=True)
+            self._probability_worker.start()
+
+        # Only send the cells that changed, so that the worker never
+        # reads the grid while a move is being made
+        self._probability_requests.put(
+            (self._probability_generation, self._changed_cells))
+        self._changed_cells = []
+
+        if not self._polling_probabilities:
+            self._polling_probabilities = True
+            self._root.after(PROBABILITY_POLL_INTERVAL,
+                             self._poll_probabilities)
+
+    def _calculate_probabilities(self):
+        """
+        Worker thread loop which calculates mine probabilities for each
+        requested board and passes the results back to the GUI thread.
+        """
+        calculator = MineProbabilityCalculator(
+            Grid.GRID_ROWS, Grid.GRID_COLUMNS, Grid.NUM_MINES)
+
+        def is_stale():
+            return generation != self._probability_generation
+
+        while True:
+            generation, changes = self._probability_requests.get()
+            calculator.update(changes)
+
+            # Catch up with any moves made while the last calculation
+            # was running, and only calculate for the newest
+            try:
+                while True:
+                    generation, changes = (
+                        self._probability_requests.get_nowait())
+                    calculator.update(changes)
+            except queue.Empty:
+                pass
+
+            # Returns None if the player moves again before it finishes
+            result = calculator.calculate(is_stale)
+            if result is not None:
+                self._probability_results.put((generation, result))
+
+    def _poll_probabilities(self):
+        """
+        Apply any probabilities calculated for the current board, and
+        keep polling until the latest request has been answered.
+        """
+        answered = False
+        try:
+            while True:
+                generation, result = self._probability_results.get_nowait()
+
+                # Drop results for boards the player has since changed
+                if generation == self._probability_generation:
+                    self._show_probability_overlay(*result)
+                    answered = True
+        except queue.Empty:
+            pass
+
+        if answered or not self._show_probabilities.get():
+            self._polling_probabilities = False
+        else:
+            self._root.after(PROBABILITY_POLL_INTERVAL,
+                             self._poll_probabilities)
+
+    def _show_probability_overlay(self, probabilities, other_probability):
+        """
+        Tint each covered cell by its probability of being mined. Cells
+        not in probabilities are tinted by other_probability.
+        """
+        other_colour = _probability_colour(other_probability)
+
+        for r in range(len(self._buttons)):
+            for c in range(len(self._buttons[r])):
+                state = self._shown_states[r][c]
+
+                if state == CellState.COVERED:
+                    if (r, c) in probabilities:
+                        self._buttons[r][c]["bg"] = _probability_colour(
+                            probabilities[(r, c)])
+                    else:
+                        self._buttons[r][c]["bg"] = other_colour
+                elif state == CellState.FLAGGED:
+                    self._buttons[r][c]["bg"] = self._covered_bg
+
+    def _clear_probabilities(self):
+        """Remove the probability tint from all covered cells."""
+        for r in range(len(self._buttons)):
+            for c in range(len(self._buttons[r])):
+                if self._shown_states[r][c] != CellState.UNCOVERED:
+                    self._buttons[r][c]["bg"] = self._covered_bg
+
+
+def _probability_colour(probability):
+    """
+    Get the overlay colour for a mine probability, ranging from green
+    for 0 to red for 1.
+    """
+    red = int(0x80 + 0x7F * probability)
+    green = int(0xFF - 0x7F * probability)
+    return "#{:02X}{:02X}80".format(red, green)
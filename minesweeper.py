@@ -3,6 +3,7 @@ import sys
 from consoleview import ConsoleView
 from gameengine import GameEngine
 from guiview import GuiView
+from models import BitboardGrid, Grid
 
 def main():
     """
@@ -14,6 +15,16 @@ def main():
     else:
         run_gui_game()
 
+def selected_grid_type():
+    """
+    Get the Grid implementation to play with. The bitboard grid is used
+    if -b is given as an argument.
+    """
+    if "-b" in sys.argv:
+        return BitboardGrid
+    else:
+        return Grid
+
 def run_cli_game():
     """
     Run a game of Minesweeper using the console for output.
@@ -21,7 +32,7 @@ def run_cli_game():
     """
     # Set up game
     view = ConsoleView()
-    game = GameEngine(view)
+    game = GameEngine(view, selected_grid_type())
 
     # Game loop
     while not game.game_over:
@@ -94,7 +105,7 @@ def run_gui_game():
     """Run a game of Minesweeper with a graphical user interface."""
     # Set up game
     view = GuiView()
-    game = GameEngine(view)
+    game = GameEngine(view, selected_grid_type())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import enum
 import random
+import struct
 import sys
 
 class Cell:
@@ -76,21 +77,21 @@ class Grid:
         stringrepr += "-\n"
         
         # Add each row of the grid
-        for row in range(len(self._grid)):
+        for row in range(self.GRID_ROWS):
             # Row index label
             stringrepr += str(row).ljust(COLUMN_WIDTH + 1) + COLUMN_DIVIDER
 
             # Add each cell in the row
-            for col in range(len(self._grid[row])):
-                cell = self._grid[row][col]
+            for col in range(self.GRID_COLUMNS):
+                state = self.cell_state_at(row, col)
 
-                if cell.state == CellState.COVERED:
+                if state == CellState.COVERED:
                     stringrepr += COVERED_CELL
-                elif cell.state == CellState.FLAGGED:
+                elif state == CellState.FLAGGED:
                     stringrepr += FLAGGED_CELL
                 else:
                     # Cell is uncovered or in an invalid state
-                    if cell.mined:
+                    if self.has_mine_at(row, col):
                         stringrepr += MINED_CELL
                     else:
                         # Display the number of surrounding Cells which
@@ -290,3 +291,431 @@ class Grid:
                     - uncovered_cells)
         
         return remaining > 0
+
+
+class BitboardGrid(Grid):
+    """
+    A grid which stores its mined, uncovered and flagged cells as
+    integer bitmasks rather than as Cell objects.
+
+    Cell (col, row) is bit row * (GRID_COLUMNS + 1) + col of each
+    mask. Every row is padded with one unused column, which is never
+    set in any mask, so that shifting a mask left or right by one bit
+    cannot carry a cell from the end of one row into the start of the
+    next.
+
+    Uncovering and checking for a win are done with whole-board bitwise
+    operations instead of looping over every cell.
+    """
+
+    def __init__(self):
+        # Number of bits per row, including the padding column
+        self._row_width = self.GRID_COLUMNS + 1
+
+        # Mask with a bit set for every position in the grid
+        row_mask = (1 << self.GRID_COLUMNS) - 1
+        self._board = 0
+        for row in range(self.GRID_ROWS):
+            self._board |= row_mask << (row * self._row_width)
+
+        self._mines = 0
+        self._uncovered = 0
+        self._flagged = 0
+
+        # Initialise the mine positions
+        self._set_mines()
+
+        # Non-mined cells with no mined neighbours. Uncovering spreads
+        # through these cells.
+        self._zero_mask = self._board & ~self._dilate(self._mines)
+
+    def _bit(self, row, col):
+        """Get a mask with only the bit for (col, row) set."""
+        return 1 << (row * self._row_width + col)
+
+    def _dilate(self, mask):
+        """
+        Grow a mask by one cell in every direction, including
+        diagonals.
+        """
+        # Spread sideways, clearing anything shifted into the padding
+        # column or off the start of the board
+        mask = (mask | (mask << 1) | (mask >> 1)) & self._board
+
+        # Spread up and down
+        return (mask | (mask << self._row_width)
+                | (mask >> self._row_width)) & self._board
+
+    def _set_mines(self):
+        """
+        Set the cells in the board which will contain mines. Intended
+        to be called when a BitboardGrid is created.
+
+        This method does not clear any positions which have already been
+        set to have mines.
+        """
+        cells_to_mine = set()
+        while len(cells_to_mine) < self.NUM_MINES:
+            row = random.randrange(self.GRID_ROWS)
+            col = random.randrange(self.GRID_COLUMNS)
+            cells_to_mine.add((row, col))
+
+        for cell_pos in cells_to_mine:
+            self._mines |= self._bit(cell_pos[0], cell_pos[1])
+
+    def mined_neighbours(self, row, col):
+        """
+        Get the number of mined cells that are neighbours of the cell
+        at (col, row)
+        """
+        # Line the 3x3 block around (col, row) up with the lowest bits,
+        # then mask out everything but the eight neighbours
+        start = (row - 1) * self._row_width + col - 1
+        if start >= 0:
+            window = self._mines >> start
+        else:
+            window = self._mines << -start
+
+        neighbours = (0b101 << self._row_width
+                      | 0b111
+                      | 0b111 << (2 * self._row_width))
+
+        return bin(window & neighbours).count("1")
+
+    def has_mine_at(self, row, col):
+        """
+        Return True if (col, row) is a valid position in the grid and
+        contains a mine.
+        """
+        return (self.has_cell_at(row, col)
+                and self._mines & self._bit(row, col) != 0)
+
+    def cell_state_at(self, row, col):
+        """
+        Get the state of the cell at (col, row), or None otherwise.
+        """
+        if self.has_cell_at(row, col):
+            bit = self._bit(row, col)
+
+            if self._uncovered & bit:
+                return CellState.UNCOVERED
+            elif self._flagged & bit:
+                return CellState.FLAGGED
+            else:
+                return CellState.COVERED
+        else:
+            return None
+
+    def set_cell_state(self, row, col, new_state):
+        """
+        Set the cell at (col, row) to have state new_state.
+
+        Returns False if the cell does not exist.
+        """
+        if self.has_cell_at(row, col):
+            bit = self._bit(row, col)
+
+            self._uncovered &= ~bit
+            self._flagged &= ~bit
+
+            if new_state == CellState.UNCOVERED:
+                self._uncovered |= bit
+            elif new_state == CellState.FLAGGED:
+                self._flagged |= bit
+
+            return True
+        else:
+            return False
+
+    def uncover_from(self, row, col):
+        """
+        Begin uncovering cells from (col, row).
+
+        If (col, row) is not a mine, it's non-mine neighbours will be
+        uncovered. Every time a neighbour cell with no neighbouring
+        mines is uncovered, it's neighbours will also be uncovered.
+
+        Returns True unless there is a mine at (col, row).
+        """
+        if self.has_cell_at(row, col):
+            bit = self._bit(row, col)
+
+            if self._mines & bit:
+                # Hit a mine - game over
+                self._flagged &= ~bit
+                self._uncovered |= bit
+                return False
+            elif self.cell_state_at(row, col) == CellState.COVERED:
+                # Spread from (col, row) through unflagged cells with no
+                # mined neighbours until the region stops growing
+                passable = self._zero_mask & ~self._flagged
+                region = bit
+                while True:
+                    grown = region | (self._dilate(region) & passable)
+                    if grown == region:
+                        break
+                    region = grown
+
+                # Uncover the region and everything bordering it
+                self._uncovered |= (self._dilate(region)
+                                    & ~self._mines & ~self._flagged)
+
+        # Always returns True unless a mine is hit
+        return True
+
+    def cells_left_to_uncover(self):
+        """
+        Check whether or not there are non-mined cells that haven't been
+        uncovered yet.
+        """
+        return self._uncovered | self._mines != self._board
+
+
+class BufferGrid(Grid):
+    """
+    A grid stored in a flat buffer, such as a memory-mapped file or
+    shared memory, so that several processes can use the same board
+    without copying it.
+
+    The buffer holds a fixed-size header followed by three planes of
+    one byte per cell, in row-major order:
+     - mine plane  -- 1 if the cell is mined, otherwise 0
+     - state plane -- the cell's CellState value
+     - count plane -- the cell's number of mined neighbours
+
+    The header also keeps a running count of uncovered non-mined cells,
+    so checking for a win doesn't need to look at every cell. Only one
+    process should make moves on a board at a time; other processes
+    can read it through a read-only view of the same buffer.
+    """
+
+    # magic, format version, rows, columns, mines, uncovered cells
+    HEADER = struct.Struct("<4sIIIII")
+    MAGIC = b"MSWB"
+    VERSION = 1
+
+    def __init__(self, buffer=None):
+        """
+        Create a grid on top of buffer, which must already contain a
+        board written by BufferGrid.write_board().
+
+        If buffer is None, a new board of GRID_ROWS x GRID_COLUMNS with
+        randomly placed mines is created in memory.
+        """
+        if buffer is None:
+            buffer = bytearray(self.buffer_size(self.GRID_ROWS,
+                                                self.GRID_COLUMNS))
+            self.write_board(self._random_mines(), buffer)
+
+        self._buffer = memoryview(buffer).cast("B")
+        magic, version, rows, cols, mines, _ = self.HEADER.unpack_from(
+            self._buffer)
+
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("Buffer does not contain a minesweeper board")
+
+        # The board size comes from the buffer rather than the class
+        self.GRID_ROWS = rows
+        self.GRID_COLUMNS = cols
+        self.NUM_MINES = mines
+
+        cells = rows * cols
+        if len(self._buffer) < self.buffer_size(rows, cols):
+            raise ValueError("Buffer is too small for a {}x{} board"
+                             .format(rows, cols))
+
+        start = self.HEADER.size
+        self._mine_plane = self._buffer[start:start + cells]
+        self._state_plane = self._buffer[start + cells:start + 2 * cells]
+        self._count_plane = self._buffer[start + 2 * cells:
+                                         start + 3 * cells]
+
+    @classmethod
+    def buffer_size(cls, rows, cols):
+        """Get the number of bytes needed to store a rows x cols board."""
+        return cls.HEADER.size + 3 * rows * cols
+
+    @classmethod
+    def write_board(cls, grid, buffer):
+        """
+        Write the mines, cell states and neighbour counts of any Grid
+        into buffer, which must be at least buffer_size() bytes long.
+        """
+        rows = grid.GRID_ROWS
+        cols = grid.GRID_COLUMNS
+        cells = rows * cols
+
+        mine_plane = bytearray(cells)
+        state_plane = bytearray(cells)
+        count_plane = bytearray(cells)
+        uncovered = 0
+        mines = 0
+
+        for row in range(rows):
+            for col in range(cols):
+                i = row * cols + col
+                state = grid.cell_state_at(row, col)
+
+                state_plane[i] = state.value
+                count_plane[i] = grid.mined_neighbours(row, col)
+
+                if grid.has_mine_at(row, col):
+                    mine_plane[i] = 1
+                    mines += 1
+                elif state == CellState.UNCOVERED:
+                    uncovered += 1
+
+        view = memoryview(buffer).cast("B")
+        cls.HEADER.pack_into(view, 0, cls.MAGIC, cls.VERSION,
+                             rows, cols, mines, uncovered)
+
+        start = cls.HEADER.size
+        view[start:start + cells] = mine_plane
+        view[start + cells:start + 2 * cells] = state_plane
+        view[start + 2 * cells:start + 3 * cells] = count_plane
+
+    def _random_mines(self):
+        """
+        Get a Cell-object Grid of this grid's size with randomly placed
+        mines, to be written into a new buffer.
+        """
+        return type("Grid", (Grid,),
+                    {"GRID_ROWS": self.GRID_ROWS,
+                     "GRID_COLUMNS": self.GRID_COLUMNS,
+                     "NUM_MINES": self.NUM_MINES})()
+
+    def _uncovered_count(self):
+        """Get the number of uncovered non-mined cells."""
+        return self.HEADER.unpack_from(self._buffer)[5]
+
+    def _set_state(self, i, new_state):
+        """
+        Set the state of the cell at plane index i, keeping the count of
+        uncovered cells in the header up to date.
+        """
+        old_state = self._state_plane[i]
+        if old_state == new_state.value:
+            return
+
+        self._state_plane[i] = new_state.value
+
+        if not self._mine_plane[i]:
+            change = ((new_state == CellState.UNCOVERED)
+                      - (old_state == CellState.UNCOVERED.value))
+            if change != 0:
+                # The count is the last field in the header
+                struct.pack_into("<I", self._buffer, self.HEADER.size - 4,
+                                 self._uncovered_count() + change)
+
+    def mined_neighbours(self, row, col):
+        """
+        Get the number of mined cells that are neighbours of the cell
+        at (col, row)
+        """
+        return self._count_plane[row * self.GRID_COLUMNS + col]
+
+    def has_mine_at(self, row, col):
+        """
+        Return True if (col, row) is a valid position in the grid and
+        contains a mine.
+        """
+        return (self.has_cell_at(row, col)
+                and self._mine_plane[row * self.GRID_COLUMNS + col] == 1)
+
+    def cell_state_at(self, row, col):
+        """
+        Get the state of the cell at (col, row), or None otherwise.
+        """
+        if self.has_cell_at(row, col):
+            return CellState(self._state_plane[row * self.GRID_COLUMNS + col])
+        else:
+            return None
+
+    def set_cell_state(self, row, col, new_state):
+        """
+        Set the cell at (col, row) to have state new_state.
+
+        Returns False if the cell does not exist.
+        """
+        if self.has_cell_at(row, col):
+            self._set_state(row * self.GRID_COLUMNS + col, new_state)
+            return True
+        else:
+            return False
+
+    def uncover_from(self, row, col):
+        """
+        Begin uncovering cells from (col, row).
+
+        If (col, row) is not a mine, it's non-mine neighbours will be
+        uncovered. Every time a neighbour cell with no neighbouring
+        mines is uncovered, it's neighbours will also be uncovered.
+
+        Returns True unless there is a mine at (col, row).
+        """
+        if self.has_cell_at(row, col):
+            i = row * self.GRID_COLUMNS + col
+
+            if self._mine_plane[i]:
+                # Hit a mine - game over
+                self._set_state(i, CellState.UNCOVERED)
+                return False
+            elif self._state_plane[i] == CellState.COVERED.value:
+                self._uncover_region(row, col)
+
+        # Always returns True unless a mine is hit
+        return True
+
+    def _uncover_region(self, row, col):
+        """
+        Implements the cell uncovering component of
+        BufferGrid.uncover_from() without recursion.
+
+        Uncovers (col, row) and its neighbours, then keeps uncovering
+        around every reachable unflagged cell with no mined neighbours.
+        """
+        flagged = CellState.FLAGGED.value
+        to_visit = [(row, col)]
+        visited = {(row, col)}
+
+        while len(to_visit) > 0:
+            row, col = to_visit.pop()
+            self._set_state(row * self.GRID_COLUMNS + col,
+                            CellState.UNCOVERED)
+
+            for r in range(row - 1, row + 2):
+                for c in range(col - 1, col + 2):
+                    if (not (r == row and c == col)
+                        and self.has_cell_at(r, c)):
+                        i = r * self.GRID_COLUMNS + c
+
+                        if (self._mine_plane[i]
+                            or self._state_plane[i] == flagged):
+                            continue
+
+                        self._set_state(i, CellState.UNCOVERED)
+
+                        # Keep uncovering from neighbours which don't
+                        # neighbour any mines
+                        if (self._count_plane[i] == 0
+                            and (r, c) not in visited):
+                            visited.add((r, c))
+                            to_visit.append((r, c))
+
+    def cells_left_to_uncover(self):
+        """
+        Check whether or not there are non-mined cells that haven't been
+        uncovered yet.
+        """
+        return (self.GRID_ROWS * self.GRID_COLUMNS
+                - self.NUM_MINES
+                - self._uncovered_count()) > 0
+
+    def release(self):
+        """
+        Release this grid's views of its buffer, so that the buffer can
+        be closed. The grid cannot be used afterwards.
+        """
+        for view in (self._mine_plane, self._state_plane,
+                     self._count_plane, self._buffer):
+            view.release()
@@ -0,0 +1,334 @@
+from models import CellState
+
+class MineProbabilityCalculator:
+    """
+    Estimates the probability that each covered cell in a grid contains
+    a mine, using only the information visible to the player.
+
+    Covered cells that neighbour an uncovered cell form the frontier.
+    Each uncovered cell gives a constraint on how many of its covered
+    neighbours are mined, and the frontier is split into independent
+    groups of cells linked by shared constraints. Each group's
+    probabilities are counted exactly over every mine arrangement
+    consistent with the numbers shown.
+
+    The calculator keeps its own copy of the board, which is updated
+    with only the cells that changed since the last move. Constraints,
+    groups and their results are kept between moves, so only the
+    groups touched by a move are recalculated.
+
+    Groups are treated independently of each other and of the total
+    number of mines, so the result is an estimate rather than an exact
+    probability.
+    """
+
+    def __init__(self, rows, cols, num_mines):
+        self._rows = rows
+        self._cols = cols
+        self._num_mines = num_mines
+
+        # The board as last seen, and the number of mined neighbours of
+        # each uncovered cell
+        self._states = [[CellState.COVERED] * cols for _ in range(rows)]
+        self._mine_counts = {}
+        self._flagged = 0
+        self._covered = rows * cols
+
+        # Maps the position of each uncovered cell to its (cells, mines)
+        # constraint, where cells is a frozenset of covered neighbours
+        # and mines is how many of them must contain a mine
+        self._constraints = {}
+
+        # A group is a frozenset of the uncovered cells whose
+        # constraints it contains. Maps each frontier cell to its group,
+        # and each group to its (probabilities, expected mines) result,
+        # or None if it hasn't been calculated yet.
+        self._group_of = {}
+        self._group_cells = {}
+        self._group_results = {}
+
+    def update(self, changes):
+        """
+        Update the board with a list of (row, col, state, mine count)
+        tuples for the cells that have changed. The mine count is only
+        needed for uncovered cells which are not mined, and is None
+        otherwise.
+        """
+        changed = set()
+
+        for row, col, state, count in changes:
+            old_state = self._states[row][col]
+            self._states[row][col] = state
+
+            self._flagged += ((state == CellState.FLAGGED)
+                              - (old_state == CellState.FLAGGED))
+            self._covered += ((state == CellState.COVERED)
+                              - (old_state == CellState.COVERED))
+
+            if state == CellState.UNCOVERED and count is not None:
+                self._mine_counts[(row, col)] = count
+            else:
+                self._mine_counts.pop((row, col), None)
+
+            changed.add((row, col))
+
+        # Only uncovered cells next to a changed cell can have a
+        # different constraint
+        affected = set()
+        for pos in changed:
+            for neighbour in self._neighbours_of(*pos) + [pos]:
+                if (neighbour in self._mine_counts
+                    or neighbour in self._constraints):
+                    affected.add(neighbour)
+
+        touched_cells = set()
+        for pos in affected:
+            if pos in self._constraints:
+                touched_cells |= self._constraints.pop(pos)[0]
+
+            constraint = self._constraint_at(pos)
+            if constraint is not None:
+                self._constraints[pos] = constraint
+                touched_cells |= constraint[0]
+
+        # Break up every group containing a cell whose constraints
+        # changed, then regroup their uncovered cells along with any
+        # new constraints
+        to_regroup = {pos for pos in affected if pos in self._constraints}
+        for group in {self._group_of[cell] for cell in touched_cells
+                      if cell in self._group_of}:
+            del self._group_results[group]
+            for cell in self._group_cells.pop(group):
+                del self._group_of[cell]
+
+            for pos in group:
+                if pos in self._constraints:
+                    to_regroup.add(pos)
+
+        for group in self._groups(to_regroup):
+            cells = frozenset().union(
+                *(self._constraints[pos][0] for pos in group))
+
+            self._group_results[group] = None
+            self._group_cells[group] = cells
+            for cell in cells:
+                self._group_of[cell] = group
+
+    def calculate(self, is_stale=lambda: False):
+        """
+        Calculate the mine probability of every covered cell.
+
+        Returns a (probabilities, other probability) tuple, where
+        probabilities maps the (row, col) of each covered frontier cell
+        to a probability between 0 and 1, and other probability applies
+        to every other covered cell. Flagged cells are not included.
+
+        is_stale is called regularly while calculating, and if it
+        returns True the calculation stops and None is returned. Any
+        groups finished so far are kept for the next calculation.
+        """
+        for group, result in self._group_results.items():
+            if result is None:
+                result = self._solve_group(group, is_stale)
+                if result is None:
+                    return None
+                self._group_results[group] = result
+
+        probabilities = {}
+        expected_frontier_mines = 0
+        for result in self._group_results.values():
+            probabilities.update(result[0])
+            expected_frontier_mines += result[1]
+
+        # Spread the remaining mines evenly over covered cells that are
+        # not on the frontier
+        others = self._covered - len(probabilities)
+        if others > 0:
+            remaining = (self._num_mines - self._flagged
+                         - expected_frontier_mines)
+            other_probability = min(max(remaining / others, 0.0), 1.0)
+        else:
+            other_probability = 0.0
+
+        return (probabilities, other_probability)
+
+    def _neighbours_of(self, row, col):
+        """Get a list of the positions that neighbour (row, col)."""
+        return [(r, c)
+                for r in range(row - 1, row + 2)
+                for c in range(col - 1, col + 2)
+                if (0 <= r < self._rows and 0 <= c < self._cols
+                    and not (r == row and c == col))]
+
+    def _constraint_at(self, pos):
+        """
+        Get the constraint given by the uncovered cell at pos, or None
+        if it has no covered neighbours. Flagged cells are assumed to
+        be mined.
+        """
+        if pos not in self._mine_counts:
+            return None
+
+        unknown = set()
+        flags = 0
+        for r, c in self._neighbours_of(*pos):
+            if self._states[r][c] == CellState.COVERED:
+                unknown.add((r, c))
+            elif self._states[r][c] == CellState.FLAGGED:
+                flags += 1
+
+        if len(unknown) == 0:
+            return None
+
+        mines = min(max(self._mine_counts[pos] - flags, 0), len(unknown))
+        return (frozenset(unknown), mines)
+
+    def _groups(self, positions):
+        """
+        Split the uncovered cells in positions into groups whose
+        constraints share cells, returning a list of frozensets.
+        """
+        # Map each frontier cell to the uncovered cells constraining it
+        constrained_by = {}
+        for pos in positions:
+            for cell in self._constraints[pos][0]:
+                constrained_by.setdefault(cell, []).append(pos)
+
+        groups = []
+        unvisited = set(positions)
+        while len(unvisited) > 0:
+            start = unvisited.pop()
+            group = {start}
+            to_visit = [start]
+
+            while len(to_visit) > 0:
+                pos = to_visit.pop()
+                for cell in self._constraints[pos][0]:
+                    for linked in constrained_by[cell]:
+                        if linked in unvisited:
+                            unvisited.remove(linked)
+                            group.add(linked)
+                            to_visit.append(linked)
+
+            groups.append(frozenset(group))
+
+        return groups
+
+    def _order_cells(self, constraints):
+        """
+        Order the cells of a group so that cells sharing a constraint
+        are close together, which keeps the number of partly assigned
+        constraints small while counting.
+        """
+        linked = {}
+        for cells, _ in constraints:
+            for cell in cells:
+                linked.setdefault(cell, set()).update(cells)
+
+        def breadth_first(start):
+            order = [start]
+            seen = {start}
+            for cell in order:
+                for other in sorted(linked[cell] - seen):
+                    seen.add(other)
+                    order.append(other)
+            return order
+
+        # Start from a cell at one end of the group
+        return breadth_first(breadth_first(min(linked))[-1])
+
+    def _solve_group(self, group, is_stale):
+        """
+        Count every mine arrangement of a group's cells which satisfies
+        all of its constraints, and find how many of them mine each
+        cell.
+
+        Cells are assigned one at a time, and arrangements which have
+        placed the same number of mines in every partly assigned
+        constraint are merged, so the work grows with the width of the
+        frontier rather than the number of cells.
+
+        Returns a (probabilities, expected mines) tuple, or None if
+        is_stale returns True before counting has finished. If the
+        constraints cannot be satisfied, e.g. because a flag has been
+        placed incorrectly, the group's cells are left out of the
+        probabilities.
+        """
+        constraints = list({self._constraints[pos] for pos in group})
+        cells = self._order_cells(constraints)
+        index_of = {cell: i for i, cell in enumerate(cells)}
+
+        # For each cell, the constraints it appears in, and those whose
+        # first or last cell it is
+        constraints_of = [[] for _ in cells]
+        starting_at = [[] for _ in cells]
+        ending_at = [[] for _ in cells]
+        for k, (members, _) in enumerate(constraints):
+            indexes = sorted(index_of[cell] for cell in members)
+            for i in indexes:
+                constraints_of[i].append(k)
+            starting_at[indexes[0]].append(k)
+            ending_at[indexes[-1]].append(k)
+
+        # Cells left to assign in each constraint
+        unassigned = [len(members) for members, _ in constraints]
+
+        # Each arrangement so far is keyed by the mines it has placed in
+        # every active (partly assigned) constraint, and holds the
+        # number of arrangements, their total mines and how many mine
+        # each assigned cell
+        active = []
+        arrangements = {(): (1, 0, [])}
+
+        for i in range(len(cells)):
+            if is_stale():
+                return None
+
+            active = active + starting_at[i]
+            slot = {k: j for j, k in enumerate(active)}
+            for k in constraints_of[i]:
+                unassigned[k] -= 1
+
+            kept = [k for k in active if k not in ending_at[i]]
+            padding = (0,) * len(starting_at[i])
+
+            merged = {}
+            for key, (count, mines, cell_mines) in arrangements.items():
+                for mined in (0, 1):
+                    placed = list(key + padding)
+                    for k in constraints_of[i]:
+                        placed[slot[k]] += mined
+
+                    # Skip if a constraint now has too many mines, or
+                    # can no longer get enough
+                    if any(placed[slot[k]] > constraints[k][1]
+                           or (placed[slot[k]] + unassigned[k]
+                               < constraints[k][1])
+                           for k in constraints_of[i]):
+                        continue
+
+                    new_key = tuple(placed[slot[k]] for k in kept)
+                    new_cell_mines = cell_mines + [count * mined]
+
+                    if new_key in merged:
+                        old = merged[new_key]
+                        merged[new_key] = (
+                            old[0] + count,
+                            old[1] + mines + count * mined,
+                            [a + b for a, b in zip(old[2],
+                                                   new_cell_mines)])
+                    else:
+                        merged[new_key] = (count, mines + count * mined,
+                                           new_cell_mines)
+
+            arrangements = merged
+            active = kept
+
+        if len(arrangements) == 0:
+            return ({}, 0)
+
+        total, mines, cell_mines = arrangements[()]
+        probabilities = {cell: cell_mines[i] / total
+                         for i, cell in enumerate(cells)}
+
+        return (probabilities, mines / total)